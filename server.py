@@ -1,49 +1,154 @@
+import heapq
 import random
+import selectors
 import socket
+import sys
 import json
+import re
+import struct
 import time
 import threading
+import zlib
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-# --- CRC-32 (IEEE) pure Python ---
-def crc32_bytes(data: bytes) -> int:
-    crc = 0xFFFFFFFF
-    for b in data:
-        crc ^= b
-        for _ in range(8):
-            mask = -(crc & 1)
-            crc = (crc >> 1) ^ (0xEDB88320 & mask)
-    return crc ^ 0xFFFFFFFF
+# CRC-32C (Castagnoli), used when a message says "crc_alg":"c"; without the crc32c package
+# such frames are refused (any client could pick it, so no slow pure-Python fallback)
+try:
+    from crc32c import crc32c  # SSE4.2 / ARMv8 CRC32C instruction
+except ImportError:
+    crc32c = None
 
-def crc32_of_json_data(data_obj) -> int:
-    payload = json.dumps(data_obj, separators=(",", ":"), sort_keys=True).encode("utf-8")
-    return crc32_bytes(payload) & 0xFFFFFFFF
+
+# --- JSON (orjson if available, compact stdlib otherwise) ---
+def _dumps(obj, sort_keys=False) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return json.dumps(obj, separators=(",", ":"), sort_keys=sort_keys).encode("utf-8")
+
+def _loads(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(str(data, "utf-8", errors="ignore"))
+
+
+# --- CRC-32 (IEEE) via zlib (C) ---
+def crc32_of_json_data(data_obj, crc_fn=zlib.crc32) -> int:
+    return crc_fn(_dumps(data_obj, sort_keys=True))
+
+# a client without orjson canonicalizes with stdlib json; orjson gives the same bytes
+# (test_canonical_json.py) except for non-ASCII strings (no \u escapes) and exponent
+# floats (1e16 vs 1e+16), so only payloads with those get a second, stdlib CRC
+_STDLIB_DIFFERS = re.compile(rb'[\x80-\xff]|\d[eE][-+]?\d')
+
+def crc32_of_json_data_stdlib(data_obj, crc_fn=zlib.crc32) -> int:
+    return crc_fn(json.dumps(data_obj, separators=(",", ":"), sort_keys=True).encode("utf-8"))
+
+# protocol v2: crc32 covers the "data" object exactly as it appears on the wire
+_DATA_KEY = re.compile(rb'"data"\s*:\s*\{')
+_STR_OR_BRACE = re.compile(rb'"(?:[^"\\]|\\.)*"|[{}]')
+
+def crc32_of_raw_data(raw, crc_fn=zlib.crc32):
+    m = _DATA_KEY.search(raw)
+    if m is None:
+        return None
+    start = m.end() - 1
+    depth = 0
+    # walk only strings and braces, so braces inside strings don't count
+    for tok in _STR_OR_BRACE.finditer(raw, start):
+        c = tok.group()
+        if c == b"{":
+            depth += 1
+        elif c == b"}":
+            depth -= 1
+            if depth == 0:
+                return crc_fn(raw[start:tok.end()])
+    return None
+
+
+def _reply_prefix(mtype, sid_json) -> bytes:
+    return b'{"type":"%b","sensor_id":%b,"timestamp":' % (mtype.encode("ascii"), sid_json)
+
+
+# --- control-message peek (no full JSON parse) ---
+_PEEK_TYPE = re.compile(rb'"type":"([a-z_]*)"')
+_PEEK_SID = re.compile(rb'"sensor_id":"([^"\\]*)"')
+_PEEK_TOKEN = re.compile(rb'"token":(\d+)[,}]')
+
+
+# --- binary data frame (sensors that negotiated it via register_v2) ---
+# type, sensor_id (NUL padded), token, timestamp, low_battery, len(data) + data + crc32;
+# data is the JSON object as bytes and crc32 covers exactly those bytes
+_BIN_DATA = 0x01
+_BIN_HDR = struct.Struct("!B8sIIBH")
+_BIN_CRC = struct.Struct("!I")
 
 
 class Server:
     def __init__(self):
         self.server_ip = "127.0.0.1"
         self.server_port = 5005
-        self.sock = None
+        self.rx_workers = 1       # >1: one SO_REUSEPORT socket + thread per worker
+        self.sock = None          # primary socket, used for all sends
+        self._socks = []
 
-        # auth and addressing
+        # auth and addressing (registered sensor_ids are interned)
         self.tokens = {}          # sensor_id -> token
         self.sensor_addr = {}     # sensor_id -> addr
         self.id_type = {}         # sensor_id -> sensor_type
 
         # P10: one active sensor per type
         self.active_by_type = {}  # sensor_type -> sensor_id
+        self._lock = threading.Lock()  # guards register + probe heap across rx workers
 
         # integrity + activity
         self.last_seen = {}       # sensor_id -> last data/register time
-        self._probe = {}          # sensor_id -> {attempts, waiting, deadline, next}
         self._last_resend_req = {}  # debounce for request_resend
 
+        # activity probe state, one dict per field (sensor_id -> value)
+        self._pb_attempts = {}    # probes sent since the sensor went silent
+        self._pb_waiting = {}     # True while an activity_check awaits its ack
+        self._pb_next = {}        # earliest time for the next probe
+        self._pb_gen = {}         # bumped on re-arm; older heap entries are stale
+        self._probe_heap = []     # (due, sensor_id, gen)
+
+        # coarse clock, refreshed once per listen_loop wakeup; handlers read it
+        # instead of calling time.time() several times per packet
+        self._now = time.time()
+        self._now_s = int(self._now)
+
+        # preencoded replies for the per-packet path: per registered sensor, everything
+        # up to the timestamp value, so a reply is prefix + b"<ts>}"
+        self._ack_prefix = {}     # sensor_id -> b'{"type":"data_ack","sensor_id":"..","timestamp":'
+        self._invalid_prefix = {}
+        self._resend_prefix = {}
+        self._tmpl_invalid_token = b'{"type":"invalid_token","sensor_id":%b,"timestamp":%d}'
+
+        # binary framing: 8-byte NUL padded id -> sensor_id, only for sensors that asked
+        self._binary_ids = {}
+
+        # packet/probe log lines, written out in batches by the log flusher
+        self._log_buf = []
+        self._log_lock = threading.Lock()
+        self._log_evt = threading.Event()
+        self._log_thread = None
+
+        # message type -> handler(message, addr, raw)
+        self._handlers = {
+            "register": self.handle_register,
+            "register_v2": self.handle_register,
+            "data": self.handle_data,
+            "activity_ack": self.handle_activity_ack,
+        }
+
         # flags\
-        self._rx_thread = None  # background listener thread
+        self._rx_threads = []   # background listener threads
         self.listening = False
-        self._mon_running = False
-        self._mon_thread = None
+        self._wakers = []       # write ends of each listen_loop's wakeup socketpair
+        self._probe_waker = None  # the primary loop's, poked when a probe is due sooner
 
     # --------------- config ---------------
     def configure(self):
@@ -52,7 +157,10 @@ class Server:
         p = input(f"Enter PORT [{self.server_port}]: ").strip()
         if p:
             self.server_port = int(p)
-        print(f"Configured IP={self.server_ip}, PORT={self.server_port}\n")
+        w = input(f"Enter RX WORKERS [{self.rx_workers}]: ").strip()
+        if w:
+            self.rx_workers = max(1, int(w))
+        print(f"Configured IP={self.server_ip}, PORT={self.server_port}, WORKERS={self.rx_workers}\n")
 
     # --------------- start ---------------
     def start_listening(self):
@@ -61,112 +169,236 @@ class Server:
             print(f"Already listening on {self.server_ip}:{self.server_port}")
             return
 
-        # bind socket
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.sock.bind((self.server_ip, self.server_port))
-        self.sock.settimeout(0.5)
+        # bind socket(s)
+        self._socks = [self._open_socket() for _ in range(self.rx_workers)]
+        self.sock = self._socks[0]
 
-        # flip flags and start monitors
+        # flip flags; activity probes run inside the primary listen_loop
         self.listening = True
-        self.start_activity_monitor()
 
         print(f"Server listening on {self.server_ip}:{self.server_port} (background).")
 
+        if self._log_thread is None:
+            self._log_thread = threading.Thread(target=self._log_loop, daemon=True)
+            self._log_thread.start()
+
         # spusti prijimaciu slucku na pozadi, menu ostava dostupne
-        self._rx_thread = threading.Thread(target=self.listen_loop, daemon=True)
-        self._rx_thread.start()
+        self._rx_threads = [threading.Thread(target=self.listen_loop, args=(s,), daemon=True)
+                            for s in self._socks]
+        for t in self._rx_threads:
+            t.start()
+
+    def _open_socket(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if self.rx_workers > 1:
+            # kernel spreads datagrams across the sockets by 4-tuple, so one
+            # sensor always lands on the same worker
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        # room for bursts of acks/probes before sendto starts failing
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+        sock.bind((self.server_ip, self.server_port))
+        sock.setblocking(False)
+        return sock
 
     # --------------- monitor ---------------
-    def start_activity_monitor(self):
-        if self._mon_running:
+    # probes run as timers inside the primary listen_loop (no separate thread)
+    def _arm_probe(self, sensor_id, due):
+        with self._lock:
+            gen = self._pb_gen.get(sensor_id, 0) + 1
+            self._pb_gen[sensor_id] = gen
+            sooner = not self._probe_heap or due < self._probe_heap[0][0]
+            heapq.heappush(self._probe_heap, (due, sensor_id, gen))
+        # the primary loop sleeps until the earliest due probe; shorten that sleep
+        if sooner:
+            self._wake(self._probe_waker)
+
+    def _wake(self, waker):
+        if waker is None:
             return
-        self._mon_running = True
-        self._mon_thread = threading.Thread(target=self._monitor_loop, daemon=True)
-        self._mon_thread.start()
-
-    def stop_activity_monitor(self):
-        self._mon_running = False
-        if self._mon_thread:
-            self._mon_thread.join(timeout=1.0)
-
-    def _monitor_loop(self):
-        while self._mon_running and self.listening:
-            now = time.time()
-            for sensor_id in list(self.tokens.keys()):
-                last = self.last_seen.get(sensor_id, now)
-                if now - last < 15.0:
+        try:
+            waker.send(b"\0")
+        except OSError:
+            pass  # buffer full (a wakeup is already pending) or loop gone
+
+    def _probe_reset(self, sensor_id):
+        # data or ack proves life; returns how many probes had been sent
+        self._pb_waiting.pop(sensor_id, None)
+        self._pb_next.pop(sensor_id, None)
+        return self._pb_attempts.pop(sensor_id, 0)
+
+    def _run_probes(self, now):
+        # fire due probe timers; returns seconds until the next one (None: nothing armed)
+        heap = self._probe_heap
+        while heap and heap[0][0] <= now:
+            with self._lock:
+                _, sensor_id, gen = heapq.heappop(heap)
+            if gen != self._pb_gen.get(sensor_id):
+                continue
+            due = self._probe_step(sensor_id, now)
+            if due is not None:
+                with self._lock:
+                    heapq.heappush(heap, (due, sensor_id, gen))
+        return max(0.0, heap[0][0] - now) if heap else None
+
+    def _probe_step(self, sensor_id, now):
+        # one monitor tick for one sensor; returns when to look at it again
+        if sensor_id not in self.tokens:
+            return None
+        last = self.last_seen.get(sensor_id, now)
+        if now - last < 15.0:
+            return last + 15.0
+
+        # a waiting sensor is only due at its ack deadline -> DISCONNECTED and schedule next
+        if self._pb_waiting.get(sensor_id):
+            self._log(f"WARNING: {sensor_id} DISCONNECTED!")
+            self._pb_waiting[sensor_id] = False
+            self._pb_next[sensor_id] = now + 5.0  # next probe in 5s
+
+        # send next probe if due, max 10 attempts
+        attempts = self._pb_attempts.get(sensor_id, 0)
+        next_at = self._pb_next.get(sensor_id, 0.0)
+        if attempts >= 10:
+            return None  # gave up; data or activity_ack re-arms it
+        if now >= next_at:
+            addr = self.sensor_addr.get(sensor_id)
+            if addr:
+                ping = {
+                    "type": "activity_check",
+                    "sensor_type": self.id_type.get(sensor_id, "UNKNOWN"),
+                    "sensor_id": sensor_id,
+                    "token": self.tokens.get(sensor_id),
+                    "timestamp": int(now),
+                    "low_battery": False,
+                    "attempt": attempts + 1,
+                }
+                self.safe_send(addr, ping)
+                self._pb_attempts[sensor_id] = attempts + 1
+                self._pb_waiting[sensor_id] = True
+                return now + 1.0  # wait up to 1s for ack
+        return max(next_at, now + 0.2)
+
+    # --------------- main loop ---------------
+    def listen_loop(self, sock=None):
+        sock = sock or self.sock
+        timers = sock is self.sock  # the primary worker also runs the probes
+        # one reusable receive buffer; each datagram is handled before the next recv
+        buf = bytearray(65535)
+        view = memoryview(buf)
+        recv_into = sock.recvfrom_into
+        wake_r, wake_w = socket.socketpair()
+        wake_r.setblocking(False)
+        wake_w.setblocking(False)
+        self._wakers.append(wake_w)
+        if timers:
+            self._probe_waker = wake_w
+        sel = selectors.DefaultSelector()
+        sel.register(sock, selectors.EVENT_READ)
+        sel.register(wake_r, selectors.EVENT_READ)
+        try:
+            while self.listening:
+                # sleep until a datagram, the next probe, or a wakeup (re-arm / shutdown)
+                timeout = self._run_probes(time.time()) if timers else None
+                readable = False
+                for key, _ in sel.select(timeout):
+                    if key.fileobj is wake_r:
+                        try:
+                            while wake_r.recv(64):
+                                pass
+                        except BlockingIOError:
+                            pass
+                    else:
+                        readable = True
+                if not readable:
                     continue
+                self._now = now = time.time()
+                self._now_s = int(now)
+                # drain what is queued, at most 64 per wakeup so probes stay on time
+                for _ in range(64):
+                    try:
+                        nbytes, addr = recv_into(buf)
+                    except BlockingIOError:
+                        break
+                    except OSError:
+                        return
+                    self.dispatch(view[:nbytes], addr)
+        finally:
+            sel.close()
+            wake_r.close()
+
+    def dispatch(self, data, addr):
+        if data and data[0] == _BIN_DATA:
+            self.dispatch_binary(data, addr)
+            return
 
-                st = self._probe.get(sensor_id)
-                if st is None:
-                    st = {"attempts": 0, "waiting": False, "deadline": 0.0, "next": 0.0}
-                    self._probe[sensor_id] = st
-
-                # timeout of waiting window -> DISCONNECTED and schedule next
-                if st["waiting"] and now >= st["deadline"]:
-                    print(f"WARNING: {sensor_id} DISCONNECTED!")
-                    st["waiting"] = False
-                    st["next"] = now + 5.0  # next probe in 5s
-
-                # send next probe if due, max 10 attempts
-                if not st["waiting"] and st["attempts"] < 10 and now >= st["next"]:
-                    addr = self.sensor_addr.get(sensor_id)
-                    if addr:
-                        ping = {
-                            "type": "activity_check",
-                            "sensor_type": self.id_type.get(sensor_id, "UNKNOWN"),
-                            "sensor_id": sensor_id,
-                            "token": self.tokens.get(sensor_id),
-                            "timestamp": int(now),
-                            "low_battery": False,
-                            "attempt": st["attempts"] + 1,
-                        }
-                        self.safe_send(addr, ping)
-                        st["attempts"] += 1
-                        st["waiting"] = True
-                        st["deadline"] = now + 1.0  # wait up to 1s for ack
-            time.sleep(0.2)
+        # activity_ack needs only sensor_id + token; anything unusual falls through to the full parse
+        peek = _PEEK_TYPE.search(data)
+        if peek and peek.group(1) == b"activity_ack":
+            sid = _PEEK_SID.search(data)
+            token = _PEEK_TOKEN.search(data)
+            if sid and token:
+                self.handle_activity_ack({"sensor_id": sid.group(1).decode("utf-8", errors="ignore"),
+                                          "token": int(token.group(1))}, addr)
+                return
 
-    # --------------- main loop ---------------
-    def listen_loop(self):
-        while self.listening:
-            try:
-                data, addr = self.sock.recvfrom(65535)
-            except socket.timeout:
-                continue
-            except OSError:
-                break
+        try:
+            message = _loads(data)
+        except json.JSONDecodeError:  # orjson.JSONDecodeError subclasses it
+            self._log("INFO: Corrupted message - invalid JSON")
+            return
 
-            try:
-                message = json.loads(data.decode("utf-8", errors="ignore"))
-            except json.JSONDecodeError:
-                print("INFO: Corrupted message - invalid JSON")
-                continue
+        mtype = message.get("type")
+        handler = self._handlers.get(mtype)
+        if handler is None:
+            self._log(f"Unknown message type: {mtype}")
+            return
+        handler(message, addr, data)
 
-            mtype = message.get("type")
-            if mtype == "register":
-                self.handle_register(message, addr)
-            elif mtype == "data":
-                self.handle_data(message, addr)
-            elif mtype == "activity_ack":
-                self.handle_activity_ack(message, addr)
-            else:
-                print(f"Unknown message type: {mtype}")
+    def dispatch_binary(self, data, addr):
+        try:
+            _, sid, token, ts, low_batt, n = _BIN_HDR.unpack_from(data)
+            (crc,) = _BIN_CRC.unpack_from(data, _BIN_HDR.size + n)
+            blob = data[_BIN_HDR.size:_BIN_HDR.size + n]
+            data_obj = _loads(blob)
+        except (struct.error, json.JSONDecodeError):
+            self._log("INFO: Corrupted message - invalid binary frame")
+            return
+
+        sensor_id = self._binary_ids.get(bytes(sid))
+        if sensor_id is None:
+            self._log("INFO: binary frame from sensor without binary framing, ignored")
+            return
+        message = {
+            "type": "data",
+            "sensor_type": self.id_type.get(sensor_id, "UNKNOWN"),
+            "sensor_id": sensor_id,
+            "token": token,
+            "timestamp": ts,
+            "low_battery": bool(low_batt),
+            "data": data_obj,
+            "crc32": crc,
+        }
+        self.handle_data(message, addr, data_bytes=blob)
 
     # --------------- handlers ---------------
-    def handle_register(self, message, addr):
+    def handle_register(self, message, addr, raw=None):
         sensor_id = message.get("sensor_id")
         sensor_type = message.get("sensor_type", "UNKNOWN")
-        ts = message.get("timestamp", int(time.time()))
+        ts = message.get("timestamp", self._now_s)
         if not sensor_id:
-            print("INFO: register missing sensor_id, ignored")
+            self._log("INFO: register missing sensor_id, ignored")
             return
-
-        active = self.active_by_type.get(sensor_type)
+        if isinstance(sensor_id, str):
+            sensor_id = sys.intern(sensor_id)
+
+        # check-and-claim of the type slot must not interleave between workers
+        with self._lock:
+            active = self.active_by_type.get(sensor_type)
+            if active is None or active == sensor_id:
+                self.active_by_type[sensor_type] = sensor_id
         if active is not None and active != sensor_id:
-            print(f"INFO: {sensor_id} REGISTER DENIED for {sensor_type}, active is {active}")
+            self._log(f"INFO: {sensor_id} REGISTER DENIED for {sensor_type}, active is {active}")
             resp = {"type": "register_denied", "reason": "type_busy",
-                    "sensor_type": sensor_type, "active_sensor_id": active, "timestamp": int(time.time())}
+                    "sensor_type": sensor_type, "active_sensor_id": active, "timestamp": self._now_s}
             self.safe_send(addr, resp)
             return
 
@@ -174,84 +406,152 @@ class Server:
         self.tokens[sensor_id] = token
         self.sensor_addr[sensor_id] = addr
         self.id_type[sensor_id] = sensor_type
-        self.active_by_type[sensor_type] = sensor_id
-        self.last_seen[sensor_id] = time.time()
-
-        print(f"INFO: {sensor_id} REGISTERED at {ts}\n.")
-        resp = {"type": "register_ack", "sensor_id": sensor_id, "token": token, "timestamp": int(time.time())}
+        self.last_seen[sensor_id] = self._now
+        sid_raw = str(sensor_id).encode("utf-8")
+        sid_json = _dumps(sensor_id)
+        self._ack_prefix[sensor_id] = _reply_prefix("data_ack", sid_json)
+        self._invalid_prefix[sensor_id] = _reply_prefix("invalid_token", sid_json)
+        self._resend_prefix[sensor_id] = _reply_prefix("request_resend", sid_json)
+        self._arm_probe(sensor_id, self.last_seen[sensor_id] + 15.0)
+
+        self._log(f"INFO: {sensor_id} REGISTERED at {ts}\n.")
+        resp = {"type": "register_ack", "sensor_id": sensor_id, "token": token, "timestamp": self._now_s}
+
+        # register_v2 may ask for binary data frames; the id has to fit the 8-byte field
+        if message.get("type") == "register_v2" and message.get("framing") == "binary" and len(sid_raw) <= 8:
+            self._binary_ids[sid_raw.ljust(8, b"\0")] = sensor_id
+            resp["framing"] = "binary"
         self.safe_send(addr, resp)
 
-    def handle_activity_ack(self, message, addr):
+    def handle_activity_ack(self, message, addr, raw=None):
         sensor_id = message.get("sensor_id")
         token = message.get("token")
         if not sensor_id or self.tokens.get(sensor_id) != token:
             return
 
-        now = time.time()
+        now = self._now
         self.last_seen[sensor_id] = now
         self.sensor_addr[sensor_id] = addr
 
         # Print RECONNECTED only if we were actually probing (i.e., previously disconnected)
-        st = self._probe.pop(sensor_id, None)
-        if st and st.get("attempts", 0) > 0:
-            print(f"INFO: {sensor_id} RECONNECTED!")
+        if self._probe_reset(sensor_id) > 0:
+            self._log(f"INFO: {sensor_id} RECONNECTED!")
+            self._arm_probe(sensor_id, now + 15.0)
 
-    def handle_data(self, message, addr):
-        sensor_id = message.get("sensor_id")
-        sensor_type = message.get("sensor_type", "UNKNOWN")
-        token = message.get("token")
-        ts = message.get("timestamp", int(time.time()))
+    def handle_data(self, message, addr, raw=None, data_bytes=None):
+        get = message.get
+        sensor_id = get("sensor_id")
+        sensor_type = get("sensor_type", "UNKNOWN")
+        token = get("token")
+        ts = get("timestamp", self._now_s)
 
         if not sensor_id or not token:
-            print(f"INFO: DATA missing sensor_id or token at {ts}")
-            self.safe_send(addr, {"type": "invalid_token", "sensor_id": sensor_id, "timestamp": int(time.time())})
+            self._log(f"INFO: DATA missing sensor_id or token at {ts}")
+            self.send_raw(addr, self._tmpl_invalid_token % (_dumps(sensor_id), self._now_s))
             return
         if self.tokens.get(sensor_id) != token:
-            print(f"INFO: {sensor_id} INVALID TOKEN at {ts}")
-            self.safe_send(addr, {"type": "invalid_token", "sensor_id": sensor_id, "timestamp": int(time.time())})
+            self._log(f"INFO: {sensor_id} INVALID TOKEN at {ts}")
+            prefix = self._invalid_prefix.get(sensor_id)
+            if prefix is None:
+                self.send_raw(addr, self._tmpl_invalid_token % (_dumps(sensor_id), self._now_s))
+            else:
+                self.send_raw(addr, prefix + b"%d}" % self._now_s)
             return
 
         self.sensor_addr[sensor_id] = addr
         self.id_type[sensor_id] = sensor_type
-        self.last_seen[sensor_id] = time.time()
+        self.last_seen[sensor_id] = self._now
 
         # if a probe was running, data proves life -> announce once
-        st = self._probe.pop(sensor_id, None)
-        if st and st.get("attempts", 0) > 0:
-            print(f"INFO: {sensor_id} RECONNECTED!")
-
-        # integrity
-        data_obj = message.get("data", {})
-        recv_crc = message.get("crc32", None)
-        if not isinstance(recv_crc, int) or recv_crc != crc32_of_json_data(data_obj):
-            now = time.time()
+        if self._probe_reset(sensor_id) > 0:
+            self._log(f"INFO: {sensor_id} RECONNECTED!")
+            self._arm_probe(sensor_id, self._now + 15.0)
+
+        # integrity; a client may send the canonical data pre-serialized as the
+        # "data_raw" string, whose UTF-8 bytes are then CRC'd as-is (and logged,
+        # "data" is ignored next to it)
+        data_obj = get("data", {})
+        recv_crc = get("crc32", None)
+        data_raw = get("data_raw")
+        if data_bytes is None and isinstance(data_raw, str):
+            data_bytes = data_raw.encode("utf-8")
+        crc_fn = crc32c if get("crc_alg") == "c" else zlib.crc32
+        if crc_fn is None or (data_raw is not None and data_bytes is None):
+            calc_crc = None  # CRC-32C without the crc32c package, or data_raw that isn't a string
+        elif data_bytes is not None:
+            calc_crc = crc_fn(data_bytes)
+        elif get("v") == 2 and raw is not None:
+            calc_crc = crc32_of_raw_data(raw, crc_fn)
+        else:
+            canon = _dumps(data_obj, sort_keys=True)
+            calc_crc = crc_fn(canon)
+            if calc_crc != recv_crc and orjson is not None and _STDLIB_DIFFERS.search(canon):
+                calc_crc = crc32_of_json_data_stdlib(data_obj, crc_fn)
+        if not isinstance(recv_crc, int) or recv_crc != calc_crc:
+            now = self._now
             last_req = self._last_resend_req.get(sensor_id, 0)
             if now - last_req >= 1.0:
-                print(f"INFO: {sensor_id} CORRUTPED DATA at {ts}. REQUESTING DATA")
-                self.safe_send(addr, {"type": "request_resend", "sensor_id": sensor_id, "timestamp": int(time.time())})
+                self._log(f"INFO: {sensor_id} CORRUTPED DATA at {ts}. REQUESTING DATA")
+                self.send_raw(addr, self._resend_prefix[sensor_id] + b"%d}" % self._now_s)
                 self._last_resend_req[sensor_id] = now
             return
+        if data_raw is not None and data_bytes is not None:
+            try:
+                data_obj = _loads(data_bytes)
+            except json.JSONDecodeError:
+                data_obj = {}
+            if not isinstance(data_obj, dict):
+                data_obj = {}
 
         # data headers
-        if message.get("low_battery"):
-            print(f"{ts} - WARNING: LOW BATTERY {sensor_id}")
+        if get("low_battery"):
+            self._log(f"{ts} - WARNING: LOW BATTERY {sensor_id}")
         else:
-            print(f"{ts} - {sensor_id}")
+            self._log(f"{ts} - {sensor_id}")
 
         # payload (end with semicolon and blank line)
         line = "; ".join(f"{k}: {v}" for k, v in data_obj.items()) + ";"
-        print(line + "\n")
+        self._log(line + "\n")
 
         # ack
-        self.safe_send(addr, {"type": "data_ack", "sensor_id": sensor_id, "timestamp": int(time.time())})
+        self.send_raw(addr, self._ack_prefix[sensor_id] + b"%d}" % self._now_s)
+
+    # --------------- logging ---------------
+    # handlers run per packet; print() per line would serialize them on the stdout lock
+    def _log(self, line):
+        with self._log_lock:
+            self._log_buf.append(line)
+            n = len(self._log_buf)
+        if n >= 256:
+            self._flush_logs()
+        elif n == 1:
+            self._log_evt.set()
+
+    def _flush_logs(self):
+        with self._log_lock:
+            lines, self._log_buf = self._log_buf, []
+        if lines:
+            sys.stdout.write("\n".join(lines) + "\n")
+            sys.stdout.flush()
+
+    def _log_loop(self):
+        # sleeps until something is logged, then lets lines gather for 100 ms
+        while True:
+            self._log_evt.wait()
+            time.sleep(0.1)
+            self._log_evt.clear()
+            self._flush_logs()
 
     # --------------- utils ---------------
-    def safe_send(self, addr, obj):
+    def send_raw(self, addr, payload):
         try:
-            self.sock.sendto(json.dumps(obj, separators=(",", ":")).encode("utf-8"), addr)
+            self.sock.sendto(payload, addr)
         except OSError:
             pass
 
+    def safe_send(self, addr, obj):
+        self.send_raw(addr, _dumps(obj))
+
     # --------------- menu ---------------
     def menu(self):
         while True:
@@ -265,14 +565,20 @@ class Server:
             elif choice == "2":
                 self.start_listening()
             elif choice == "3":
-                print("Server shutting down.")
                 self.listening = False
-                self.stop_activity_monitor()
-                try:
-                    if self.sock:
-                        self.sock.close()
-                except OSError:
-                    pass
+                for waker in self._wakers:
+                    self._wake(waker)
+                # let workers finish the packet in hand before their sockets go away
+                for t in self._rx_threads:
+                    t.join(timeout=1.0)
+                for sock in self._socks:
+                    try:
+                        sock.close()
+                    except OSError:
+                        pass
+                # last, so nothing the workers logged is left in _log_buf
+                self._flush_logs()
+                print("Server shutting down.")
                 break
             else:
                 print("Invalid choice.")
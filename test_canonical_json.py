@@ -0,0 +1,42 @@
+import json
+import random
+import unittest
+
+import server
+from tester import _GEN_NAMES, _GEN_SPEC, _draw
+
+
+def _stdlib_canonical(obj):
+    return json.dumps(obj, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+
+@unittest.skipIf(server.orjson is None, "orjson not installed")
+class CanonicalJsonTest(unittest.TestCase):
+    # the server CRCs orjson's canonical bytes and re-checks with stdlib json only when
+    # _STDLIB_DIFFERS matches, so for everything else the two must be byte-identical
+
+    def test_generated_payloads_match_stdlib(self):
+        rnd = random.Random(1).random
+        for stype, spec in _GEN_SPEC.items():
+            for _ in range(2000):
+                data = dict(zip(_GEN_NAMES[stype], _draw(spec, rnd)))
+                canon = server._dumps(data, sort_keys=True)
+                self.assertEqual(canon, _stdlib_canonical(data), stype)
+                self.assertIsNone(server._STDLIB_DIFFERS.search(canon), canon)
+
+    def test_manual_payload_matches_stdlib(self):
+        data = {"temperature": -12, "humidity": 55.5, "dew_point": 0.0, "pressure": 1013.25,
+                "wind_direction": 359, "turbulence": 0.1, "note": "ok, \"quoted\" / \\ \t"}
+        canon = server._dumps(data, sort_keys=True)
+        self.assertEqual(canon, _stdlib_canonical(data))
+        self.assertIsNone(server._STDLIB_DIFFERS.search(canon))
+
+    def test_possible_differences_are_flagged(self):
+        # how exponents are written depends on the orjson version, so only the flag is checked
+        for data in ({"name": "Žilina"}, {"big": 1e16}, {"small": 1e-7}):
+            canon = server._dumps(data, sort_keys=True)
+            self.assertIsNotNone(server._STDLIB_DIFFERS.search(canon), data)
+
+
+if __name__ == "__main__":
+    unittest.main()
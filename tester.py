@@ -1,29 +1,108 @@
 import socket
 import json
+import queue
+import selectors
 import time
 import threading
-import random
-
-# --- CRC-32 (IEEE) pure Python, no external libs ---
-def crc32_bytes(data: bytes) -> int:
-    crc = 0xFFFFFFFF
-    for b in data:
-        crc ^= b
-        for _ in range(8):
-            mask = -(crc & 1)
-            crc = (crc >> 1) ^ (0xEDB88320 & mask)
-    return crc ^ 0xFFFFFFFF
+from zlib import crc32 as crc32_bytes
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# --- CRC-32 (IEEE) via zlib (C): polynomial 0xEDB88320, same as the server ---
+# standard check value
+assert crc32_bytes(b"123456789") == 0xCBF43926
+
+# --- JSON (orjson if available, compact stdlib otherwise) ---
+# data messages are sent as protocol v2 (the CRC covers the 'data' bytes exactly as sent),
+# so it does not matter that the two can format some values differently
+def _dumps(obj, sort_keys=False) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return json.dumps(obj, separators=(",", ":"), sort_keys=sort_keys).encode("utf-8")
+
+def _loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(str(data, "utf-8", errors="ignore"))
 
 def crc32_of_json_data(data_obj) -> int:
     # canonical JSON of the 'data' field only: compact, sorted keys
-    payload = json.dumps(data_obj, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    payload = _dumps(data_obj, sort_keys=True)
     return crc32_bytes(payload) & 0xFFFFFFFF
 
+# wire form of a data message: the head is fixed per registered sensor (%b slots take
+# JSON-encoded values), the tail is filled per send; "v":2 = crc32 over the 'data' bytes as sent
+_DATA_HEAD = b'{"type":"data","v":2,"sensor_type":%b,"sensor_id":%b,"token":%b,'
+_DATA_TAIL = b'"timestamp":%d,"low_battery":%b,"data":%b,"crc32":%d}'
+
+
+def _data_envelope(s_type, s_id, token):
+    dumps = json.dumps
+    head = _DATA_HEAD % (dumps(s_type).encode("utf-8"), dumps(s_id).encode("utf-8"),
+                         dumps(token).encode("utf-8"))
+    return head + _DATA_TAIL
+
+# random payload per sensor type: (field, low, span, round digits); digits None = int field,
+# span = high - low (+1 for ints). One random() per field, no uniform()/randint() wrappers.
+_GEN_SPEC = {
+    "ThermoNode": (
+        ("temperature", -50.0, 110.0, 1),
+        ("humidity", 0.0, 100.0, 1),
+        ("dew_point", -50.0, 110.0, 1),
+        ("pressure", 800.0, 300.0, 2),
+    ),
+    "WindSense": (
+        ("wind_speed", 0.0, 50.0, 1),
+        ("wind_gust", 0.0, 70.0, 1),
+        ("wind_direction", 0, 360, None),
+        ("turbulence", 0.0, 1.0, 1),
+    ),
+    "RainDetect": (
+        ("rainfall", 0.0, 500.0, 1),
+        ("soil_moisture", 0.0, 100.0, 1),
+        ("flood_risk", 0, 5, None),
+        ("rain_duration", 0, 61, None),
+    ),
+    "AirQualityBox": (
+        ("co2", 300, 4701, None),
+        ("ozone", 0.0, 500.0, 1),
+        ("air_quality_index", 0, 501, None),
+    ),
+}
+
+# randint(lo, hi) for int fields, uniform(lo, hi) rounded for the rest
+def _draw(spec, rnd):
+    return [lo + int(rnd() * span) if digits is None else round(lo + span * rnd(), digits)
+            for _, lo, span, digits in spec]
+
+# 'data' bytes per sensor type, in field order: %d for ints and %a (repr) for floats, which
+# is exactly how json.dumps writes them
+def _data_template(spec):
+    return b"{" + b",".join(b'"%b":%b' % (name.encode("ascii"), b"%d" if digits is None else b"%a")
+                            for name, _, _, digits in spec) + b"}"
+
+# field names in spec order, for generate_data_for
+_GEN_NAMES = {stype: tuple(f[0] for f in spec) for stype, spec in _GEN_SPEC.items()}
+
+# sensor_type -> 'data' template
+_DATA_FMT = {stype: _data_template(spec) for stype, spec in _GEN_SPEC.items()}
+
+# reply types the RX loop handles itself or hands to _reply_waiters
+_WANTED_TYPES = (b"data_ack", b"request_resend", b"activity_check",
+                 b"register_ack", b"register_denied", b"invalid_token")
+
 class Tester:
     def __init__(self):
         self.server_ip = "127.0.0.1"
         self.server_port = 5005
+        self._set_addr()
+        self._random = None      # random.random, see _rng()
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # non-blocking for good; only the RX loop reads, synchronous paths wait on _reply_waiters
+        self.sock.setblocking(False)
 
         # legacy single fields (kept for old flows)
         self.sensor_id = "T001"
@@ -39,49 +118,137 @@ class Tester:
             ("RainDetect",   "R001"),
             ("AirQualityBox","A001"),
         ]
+        self._type_by_id = {sid: stype for stype, sid in self.sensors}
         # token per sensor_id
         self.tokens = {}
 
         # last good message cache per sensor_id
         self.last_sent_ok = {}
 
+        # auto mode runs on the RX thread's select() timer, no thread of its own
         self.sending = False
-        self._auto_thread = None
+        self._auto_period = 10.0
 
         # background receiver for server control messages
         self._rx_thread = None
         self._rx_running = False
+        self._rxbuf = bytearray(2048)
+        self._sel = selectors.DefaultSelector()
+        self._sel.register(self.sock, selectors.EVENT_READ)
+        # stop_rx_loop pokes this so the RX thread leaves select() at once
+        self._rx_wake_r, self._rx_wake_w = socket.socketpair()
+        self._rx_wake_r.setblocking(False)
+        self._rx_wake_w.setblocking(False)
+        self._sel.register(self._rx_wake_r, selectors.EVENT_READ)
+        # (sensor_id | sensor_type, reply type) -> queue.Queue fed by the RX loop
+        self._reply_waiters = {}
 
         self.paused_sensors = set()
         self.activity_ping_count = {}
 
+        # menu option -> action (8 = exit is handled in menu())
+        self._menu = {
+            "1": self.configure,
+            "2": self.register_all,
+            "3": self.start_auto,
+            "4": self.stop_auto,
+            "5": self.send_manual_data,
+            "6": self.inject_bad_frame,
+            "7": self.uat4_activity_check,
+        }
+
+        # sensor_id -> (data dict, its JSON bytes as sent and CRC'd)
+        self._data_json_cache = {}
+        # sensor_id -> (sensor_type, token, data envelope template), set on register_ack
+        self._envelope_tpl = {}
+
     def configure(self):
         print("\n--- TESTER CONFIGURATION ---")
         self.server_ip = input(f"Enter SERVER IP [{self.server_ip}]: ") or self.server_ip
         port_input = input(f"Enter SERVER PORT [{self.server_port}]: ")
         if port_input.strip():
             self.server_port = int(port_input)
+        self._set_addr()
         print(f"Configured SERVER_IP={self.server_ip}, SERVER_PORT={self.server_port}\n")
 
+    # destination used by every send, resolved once; rebuilt whenever IP/port change
+    def _set_addr(self):
+        try:
+            ip = socket.gethostbyname(self.server_ip)
+        except OSError:
+            print(f"WARNING: cannot resolve {self.server_ip}, sends will fail until reconfigured.")
+            ip = self.server_ip
+        self._addr = (ip, self.server_port)
+
+    # random loads on first use; configure + exit never needs it
+    def _rng(self):
+        if self._random is None:
+            import random
+            self._random = random.random
+        return self._random
+
     def send_json(self, msg):
-        self.sock.sendto(json.dumps(msg, separators=(",", ":")).encode("utf-8"),
-                         (self.server_ip, self.server_port))
+        self.sock.sendto(self._wire(msg), self._addr)
+
+    # several messages back to back, no pacing between them
+    def send_many(self, msgs):
+        addr = self._addr
+        sendto = self.sock.sendto
+        for m in msgs:
+            sendto(self._wire(m), addr)
+
+    def _wire(self, msg):
+        if msg.get("type") == "data":
+            return self._data_wire(msg)
+        return _dumps(msg)
+
+    # data envelope built around the cached wire 'data' bytes (no dumps of the whole message)
+    def _data_wire(self, msg):
+        s_type, s_id, token = msg["sensor_type"], msg["sensor_id"], msg["token"]
+        tpl = self._envelope_tpl.get(s_id)
+        if tpl is None or tpl[0] != s_type or tpl[1] != token:
+            tpl = (s_type, token, _data_envelope(s_type, s_id, token))
+        return tpl[2] % (
+            msg["timestamp"],
+            b"true" if msg["low_battery"] else b"false",
+            self._data_blob(s_id, msg["data"]),
+            msg["crc32"],
+        )
 
     # ========================= CRC & BUILDERS =========================
 
     def _crc32_of_data(self, data_obj):
         return crc32_of_json_data(data_obj)
 
-    def _build_data_msg(self, s_type, s_id, token, low_batt=False, data=None):
+    # -> 'data' bytes for the wire, which the v2 CRC covers as-is; one entry per sensor, so
+    # resends and bad-frame copies of the latest message reuse it
+    def _data_blob(self, s_id, data):
+        hit = self._data_json_cache.get(s_id)
+        if hit is not None and hit[0] is data:
+            return hit[1]
+        blob = _dumps(data)
+        self._data_json_cache[s_id] = (data, blob)
+        return blob
+
+    def _build_data_msg(self, s_type, s_id, token, low_batt=False, data=None, ts=None):
         if data is None:
-            data = self.generate_data_for(s_type)
-        crc = self._crc32_of_data(data)
+            # orjson.dumps beats the template; it only pays off against stdlib json
+            fmt = _DATA_FMT.get(s_type) if orjson is None else None
+            if fmt is None:
+                data = self.generate_data_for(s_type)
+            else:
+                # generated payload: format the blob directly, no dumps
+                vals = _draw(_GEN_SPEC[s_type], self._rng())
+                data = dict(zip(_GEN_NAMES[s_type], vals))
+                self._data_json_cache[s_id] = (data, fmt % tuple(vals))
+        crc = crc32_bytes(self._data_blob(s_id, data))
         msg = {
             "type": "data",
+            "v": 2,
             "sensor_type": s_type,
             "sensor_id": s_id,
             "token": token,
-            "timestamp": int(time.time()),
+            "timestamp": int(time.time()) if ts is None else ts,
             "low_battery": low_batt,
             "data": data,
             "crc32": crc
@@ -90,8 +257,8 @@ class Tester:
 
     def register_all(self):
         was_running = self._rx_running
-        if was_running:
-            self.stop_rx_loop()
+        # replies are picked up by the RX loop
+        self.start_rx_loop()
         if self.sending:
             print("INFO: auto sending is running; stopping it for registration.")
             self.stop_auto()
@@ -117,8 +284,8 @@ class Tester:
         else:
             print(f"WARNING: only {successes}/{len(self.sensors)} sensors registered. Fix it before start_auto().")
 
-        if was_running or successes == len(self.sensors):
-            self.start_rx_loop()
+        if not (was_running or successes == len(self.sensors)):
+            self.stop_rx_loop()
 
     def _register_once(self, sensor_type, sensor_id):
         msg = {
@@ -127,66 +294,37 @@ class Tester:
             "sensor_id": sensor_id,
             "timestamp": int(time.time())
         }
-        self.send_json(msg)
-        try:
-            self.sock.settimeout(2)
-            data, _ = self.sock.recvfrom(4096)
-            resp = json.loads(data.decode("utf-8", errors="ignore"))
-
-            rtype = resp.get("type")
-            if rtype == "register_ack":
-                token = resp.get("token")
-                if token:
-                    self.tokens[sensor_id] = token
-                    print(f"INFO: {sensor_id} REGISTERED, token={token}")
-                    return True
-                print(f"WARNING: register for {sensor_id} has no token in response.")
-                return False
-
-            if rtype == "register_denied":
-                reason = resp.get("reason")
-                active_id = resp.get("active_sensor_id")
-                print(f"WARNING: {sensor_id} register denied ({reason}), active for {sensor_type} is {active_id}")
-                return False
-
-            print(f"WARNING: unexpected response to register: {resp}")
+        resp = self._send_and_wait(msg, ((sensor_id, "register_ack"), (sensor_type, "register_denied")))
+        if resp is None:
+            print(f"WARNING: register timeout for {sensor_id}")
             return False
 
-        except socket.timeout:
-            print(f"WARNING: register timeout for {sensor_id}")
+        rtype = resp.get("type")
+        if rtype == "register_ack":
+            token = resp.get("token")
+            if token:
+                self.tokens[sensor_id] = token
+                self._envelope_tpl[sensor_id] = (sensor_type, token,
+                                                 _data_envelope(sensor_type, sensor_id, token))
+                print(f"INFO: {sensor_id} REGISTERED, token={token}")
+                return True
+            print(f"WARNING: register for {sensor_id} has no token in response.")
             return False
-        finally:
-            self.sock.settimeout(None)
+
+        if rtype == "register_denied":
+            reason = resp.get("reason")
+            active_id = resp.get("active_sensor_id")
+            print(f"WARNING: {sensor_id} register denied ({reason}), active for {sensor_type} is {active_id}")
+            return False
+
+        print(f"WARNING: unexpected response to register: {resp}")
+        return False
 
     def generate_data_for(self, sensor_type):
-        if sensor_type == "ThermoNode":
-            return {
-                "temperature": round(random.uniform(-50.0, 60.0), 1),
-                "humidity": round(random.uniform(0.0, 100.0), 1),
-                "dew_point": round(random.uniform(-50.0, 60.0), 1),
-                "pressure": round(random.uniform(800.00, 1100.00), 2)
-            }
-        elif sensor_type == "WindSense":
-            return {
-                "wind_speed": round(random.uniform(0.0, 50.0), 1),
-                "wind_gust": round(random.uniform(0.0, 70.0), 1),
-                "wind_direction": random.randint(0, 359),
-                "turbulence": round(random.uniform(0.0, 1.0), 1)
-            }
-        elif sensor_type == "RainDetect":
-            return {
-                "rainfall": round(random.uniform(0.0, 500.0), 1),
-                "soil_moisture": round(random.uniform(0.0, 100.0), 1),
-                "flood_risk": random.randint(0, 4),
-                "rain_duration": random.randint(0, 60)
-            }
-        elif sensor_type == "AirQualityBox":
-            return {
-                "co2": random.randint(300, 5000),
-                "ozone": round(random.uniform(0.0, 500.0), 1),
-                "air_quality_index": random.randint(0, 500)
-            }
-        return {"error": "unknown sensor type"}
+        spec = _GEN_SPEC.get(sensor_type)
+        if spec is None:
+            return {"error": "unknown sensor type"}
+        return dict(zip(_GEN_NAMES[sensor_type], _draw(spec, self._rng())))
 
     def generate_data(self):
         return self.generate_data_for(self.sensor_type)
@@ -202,82 +340,151 @@ class Tester:
 
     def stop_rx_loop(self):
         self._rx_running = False
+        self._wake_rx()
         if self._rx_thread:
             self._rx_thread.join(timeout=1.0)
 
-    def _rx_loop(self):
-        # non-blocking loop to process server control messages
-        self.sock.settimeout(0.2)
-        while self._rx_running:
-            try:
-                data_raw, _ = self.sock.recvfrom(65535)
-            except socket.timeout:
-                continue
-            except OSError:
-                break
-
-            try:
-                msg = json.loads(data_raw.decode("utf-8", errors="ignore"))
-            except json.JSONDecodeError:
-                continue
-
-            mtype = msg.get("type")
-            if mtype == "request_resend":
-                sid = msg.get("sensor_id")
-                # UAT3 exact resend: prefer message prepared at injection time
-                resend = self.resend_on_request.pop(sid, None)
-                if resend is None:
-                    # fallback: last confirmed good or pending
-                    resend = self.last_sent_ok.get(sid) or self.pending_last.get(sid)
-                if resend:
-                    self.send_json(resend)
-                    # nech sa po ack povysi na last_ok
-                    self.pending_last[sid] = resend
-
-
-            elif mtype == "data_ack":
-                sid = msg.get("sensor_id")
-                # promote pending to last good only after ACK
-                if sid in self.pending_last:
-                    self.last_sent_ok[sid] = self.pending_last.pop(sid)
-
-
-            elif mtype == "activity_check":
-                sid = msg.get("sensor_id")
-                if not sid:
-                    continue
-
-                stype = msg.get("sensor_type") or next((t for t, s in self.sensors if s == sid), None)
-                token = self.tokens.get(sid)
-                if not token or not stype:
-                    continue
-
-                # This prevents fake RECONNECTED spam while paused.
-                if not self.sending:
-                    continue
-
-                # UAT4 flow: if sensor is "paused", reply only on 3rd probe, then unpause
-                if sid in self.paused_sensors:
-                    c = self.activity_ping_count.get(sid, 0) + 1
-                    self.activity_ping_count[sid] = c
-                    if c >= 3:
-                        ack = {
-                            "type": "activity_ack",
-                            "sensor_type": stype,
-                            "sensor_id": sid,
-                            "token": token,
-                            "timestamp": int(time.time()),
-                            "low_battery": False
-                        }
-                        self.send_json(ack)
-                        self.paused_sensors.discard(sid)
-                        self.activity_ping_count.pop(sid, None)
-
-        # restore blocking mode for interactive paths
+    def _wake_rx(self):
         try:
-            self.sock.settimeout(None)
+            self._rx_wake_w.send(b"\0")
         except OSError:
-            pass
+            pass  # a wakeup is already pending
+
+    def _rx_loop(self):
+        # the tester's only IO thread: sleeps in select() until a datagram, the next auto
+        # cycle or a wakeup (stop / auto on-off); no idle polling
+        wake_r = self._rx_wake_r
+        select = self._sel.select
+        # one reusable receive buffer; server replies are far below 2 KiB
+        buf = self._rxbuf
+        view = memoryview(buf)
+        recv_into = self.sock.recvfrom_into
+        loads = _loads
+        on_msg = self._on_server_msg
+        wanted = _WANTED_TYPES
+        next_t = None
+        try:
+            while self._rx_running:
+                timeout = None
+                if self.sending:
+                    next_t = self._auto_tick(next_t)
+                    timeout = max(0.0, next_t - time.monotonic())
+                else:
+                    next_t = None
+                for key, _ in select(timeout):
+                    if key.fileobj is wake_r:
+                        try:
+                            while wake_r.recv(64):
+                                pass
+                        except BlockingIOError:
+                            pass
+                        continue
+                    # drain everything queued on the socket
+                    while self._rx_running:
+                        try:
+                            nbytes, _ = recv_into(buf)
+                        except BlockingIOError:
+                            break
+                        except OSError:
+                            return
+
+                        # skip messages the tester never acts on without parsing them
+                        # (substring search runs in C)
+                        for w in wanted:
+                            if buf.find(w, 0, nbytes) >= 0:
+                                break
+                        else:
+                            continue
+
+                        try:
+                            msg = loads(view[:nbytes])
+                        except ValueError:  # json/orjson JSONDecodeError
+                            continue
+                        on_msg(msg)
+        finally:
+            # however the loop ends, start_rx_loop() must be able to start a new one
+            if self._rx_thread is threading.current_thread():
+                self._rx_running = False
+
+    # send msg and wait for the first reply matching one of the (id, type) keys; the RX loop
+    # delivers it, so the socket is never read here. None on timeout.
+    def _send_and_wait(self, msg, keys, timeout=2.0):
+        self.start_rx_loop()
+        q = self._expect_reply(*keys)
+        self.send_json(msg)
+        try:
+            return q.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        finally:
+            self._drop_waiters(q)
+
+    # register a queue for replies matching any of the (id, type) keys
+    def _expect_reply(self, *keys):
+        q = queue.Queue()
+        for key in keys:
+            self._reply_waiters[key] = q
+        return q
+
+    def _drop_waiters(self, q):
+        for key in [k for k, v in self._reply_waiters.items() if v is q]:
+            self._reply_waiters.pop(key, None)
+
+    def _on_server_msg(self, msg):
+        mtype = msg.get("type")
+        sid = msg.get("sensor_id")
+        # register_denied names only the sensor_type, other replies the sensor_id
+        ident = msg.get("sensor_type") if mtype == "register_denied" else sid
+        waiter = self._reply_waiters.get((ident, mtype))
+        if waiter is not None:
+            waiter.put_nowait(msg)
+        if mtype == "request_resend":
+            # UAT3 exact resend: prefer message prepared at injection time
+            resend = self.resend_on_request.pop(sid, None)
+            if resend is None:
+                # fallback: last confirmed good or pending
+                resend = self.last_sent_ok.get(sid) or self.pending_last.get(sid)
+            if resend:
+                self.send_json(resend)
+                # nech sa po ack povysi na last_ok
+                self.pending_last[sid] = resend
+
+
+        elif mtype == "data_ack":
+            # promote pending to last good only after ACK
+            if sid in self.pending_last:
+                self.last_sent_ok[sid] = self.pending_last.pop(sid)
+
+
+        elif mtype == "activity_check":
+            if not sid:
+                return
+
+            stype = msg.get("sensor_type") or self._type_by_id.get(sid)
+            token = self.tokens.get(sid)
+            if not token or not stype:
+                return
+
+            # This prevents fake RECONNECTED spam while paused.
+            if not self.sending:
+                return
+
+            # UAT4 flow: if sensor is "paused", reply only on 3rd probe, then unpause
+            if sid in self.paused_sensors:
+                c = self.activity_ping_count.get(sid, 0) + 1
+                self.activity_ping_count[sid] = c
+                if c >= 3:
+                    ack = {
+                        "type": "activity_ack",
+                        "sensor_type": stype,
+                        "sensor_id": sid,
+                        "token": token,
+                        "timestamp": int(time.time()),
+                        "low_battery": False
+                    }
+                    self.send_json(ack)
+                    self.paused_sensors.discard(sid)
+                    self.activity_ping_count.pop(sid, None)
 
     # ========================= MANUAL SEND =========================
 
@@ -357,26 +564,19 @@ class Tester:
 
         msg = self._build_data_msg(s_type, s_id, token, low_batt=low_battery, data=data)
 
-        # send and mark as pending; last_ok sa nastavi az po ACK
-        self.send_json(msg)
+        # mark as pending and send; last_ok sa nastavi az po ACK
+        # (the reply comes via the RX loop, which also handles resend requests)
         self.pending_last[s_id] = msg
-
-        # read a single server reply synchronously (likely data_ack)
-        try:
-            self.sock.settimeout(2)
-            data_raw, _ = self.sock.recvfrom(4096)
-            response = json.loads(data_raw.decode("utf-8", errors="ignore"))
-            print("Server replied:", response)
-
-            # immediate promotion if this is the ACK for our sensor
-            if response.get("type") == "data_ack" and response.get("sensor_id") == s_id:
-                if s_id in self.pending_last:
-                    self.last_sent_ok[s_id] = self.pending_last.pop(s_id)
-
-        except socket.timeout:
+        response = self._send_and_wait(msg, ((s_id, "data_ack"), (s_id, "invalid_token")))
+        if response is None:
             print("No ACK received (timeout)")
-        finally:
-            self.sock.settimeout(None)
+            return
+        print("Server replied:", response)
+
+        # immediate promotion if this is the ACK for our sensor
+        if response.get("type") == "data_ack" and response.get("sensor_id") == s_id:
+            if s_id in self.pending_last:
+                self.last_sent_ok[s_id] = self.pending_last.pop(s_id)
 
     # ========================= AUTO MODE =========================
 
@@ -389,49 +589,69 @@ class Tester:
             print("Already running.")
             return
         self.sending = True
-        self._auto_thread = threading.Thread(target=self.auto_loop, daemon=True)
-        self._auto_thread.start()
+        self.start_rx_loop()
+        self._wake_rx()
         print("Automatic sending started (every 10s).")
 
     def stop_auto(self):
         self.sending = False
-        if self._auto_thread:
-            self._auto_thread.join(timeout=1.0)
+        self._wake_rx()
         print("Automatic sending stopped.")
         # optional cleanup
         self.paused_sensors.clear()
         self.activity_ping_count.clear()
 
-    def auto_loop(self):
-        # periodic sender; respects paused_sensors (UAT4)
-        period = 10.0
-        while self.sending:
-            t0 = time.monotonic()
-
-            for s_type, s_id in self.sensors:
-                # UAT4: skip paused sensor -> server zacne pingat po 15s
-                if s_id in self.paused_sensors:
-                    continue
-
-                token = self.tokens.get(s_id)
-                if not token:
-                    # not registered, skip gracefully
-                    continue
+    # called from _rx_loop while sending; sends a cycle when next_t is due (None = start now)
+    # and returns the next deadline
+    def _auto_tick(self, next_t):
+        period = self._auto_period
+        now = time.monotonic()
+        if next_t is None:
+            next_t = now
+        if now < next_t:
+            return next_t
+        self._auto_cycle()
+        # absolute deadlines: time spent sending does not push later cycles back
+        next_t += period
+        if next_t - now < -period:
+            # fell a whole period behind (e.g. suspended): restart, don't burst to catch up
+            next_t = now + period
+        return next_t
+
+    def _auto_cycle(self):
+        # one periodic send; respects paused_sensors (UAT4)
+        # one timestamp for the whole cycle
+        now = int(time.time())
+        rnd = self._rng()
+        batch = []
+        for s_type, s_id in self.sensors:
+            # UAT4: skip paused sensor -> server zacne pingat po 15s
+            if s_id in self.paused_sensors:
+                continue
 
-                msg = self._build_data_msg(
-                    s_type, s_id, token,
-                    low_batt=(random.random() < 0.05)
-                )
+            token = self.tokens.get(s_id)
+            if not token:
+                # not registered, skip gracefully
+                continue
 
-                # send and mark as pending; last_ok sa nastavi az po data_ack v _rx_loop
-                self.send_json(msg)
-                self.pending_last[s_id] = msg
+            msg = self._build_data_msg(
+                s_type, s_id, token,
+                low_batt=(rnd() < 0.05),
+                ts=now
+            )
 
-                # tiny spacing to avoid burst
-                time.sleep(0.02)
+            # mark as pending before sending (the ack may beat us back otherwise);
+            # last_ok sa nastavi az po data_ack v _rx_loop
+            self.pending_last[s_id] = msg
+            batch.append(msg)
 
-            elapsed = time.monotonic() - t0
-            time.sleep(max(0.0, period - elapsed))
+        # whole cycle back to back; no app-level pacing, the kernel queues the burst
+        if batch:
+            try:
+                self.send_many(batch)
+            except OSError as e:
+                # runs on the IO thread; a bad address must not take it down
+                print(f"WARNING: auto send failed: {e}")
 
     # ========================= UAT3: BAD FRAME =========================
 
@@ -506,27 +726,15 @@ class Tester:
             print("8. Exit")
             choice = input("Select option: ").strip()
 
-            if choice == "1":
-                self.configure()
-            elif choice == "2":
-                self.register_all()
-            elif choice == "3":
-                self.start_auto()
-            elif choice == "4":
-                self.stop_auto()
-            elif choice == "5":
-                self.send_manual_data()
-            elif choice == "6":
-                self.inject_bad_frame()
-            elif choice == "7":
-                self.uat4_activity_check()
+            action = self._menu.get(choice)
+            if action:
+                action()
             elif choice == "8":
                 self.stop_auto()
                 self.stop_rx_loop()
                 print("Exiting tester.")
                 break
-
-        else:
+            else:
                 print("Invalid option.")
 
 